@@ -1,3 +1,4 @@
+import orjson
 import requests
 import sys
 
@@ -10,8 +11,13 @@ payload = {
     "maxTimeout": 60000
 }
 
-r = requests.post(FLARESOLVERR_URL, json=payload)
-data = r.json()
+# orjson: the response carries the whole solved page as one JSON string
+r = requests.post(
+    FLARESOLVERR_URL,
+    data=orjson.dumps(payload),
+    headers={"Content-Type": "application/json"},
+)
+data = orjson.loads(r.content)
 
 # If FlareSolverr returns an error field, expose it
 if "error" in data:
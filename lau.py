@@ -5,16 +5,27 @@ Scrapes multiple AP News sections and merges into a single RSS feed.
 """
 
 from __future__ import annotations
+import asyncio
+import gzip
 import sys
 import os
 import hashlib
 import logging
+import random
+import threading
 import time
-import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
-
+from itertools import chain
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import aiohttp
+import lxml.html as lxml_html
+from lxml import etree
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ------------------------------
 # CONFIG
@@ -36,11 +47,23 @@ APNEWS_HTML_FILE = "apnews.html"   # only the last section is kept for debug
 MAX_ITEMS = 500
 
 # retries / backoff
-FLARE_RETRIES = 2
+FLARE_RETRIES = 3
 FLARE_BACKOFF = 2.0
 SIMPLE_RETRIES = 3
 SIMPLE_BACKOFF = 1.5
 SIMPLE_TIMEOUT = 20
+SIMPLE_RETRY_CAP = 30.0   # upper bound for a single backoff sleep
+
+# statuses worth retrying; other 4xx fail fast
+_TRANSIENT_STATUSES = {429, 500, 502, 503, 529}
+
+# concurrent FlareSolverr requests in flight (keep ≤ its browser pool)
+FLARE_CONCURRENCY = 8
+
+# on-disk cache of solved pages, keyed by URL hash; short TTL because the
+# section listings churn quickly
+CACHE_DIR = Path(".flare_cache")
+CACHE_TTL = 15 * 60
 
 # ------------------------------
 # LOGGING
@@ -50,7 +73,7 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s: %(message)s",
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler(LOG_FILENAME, mode="w", encoding="utf-8"),
+        logging.FileHandler(LOG_FILENAME, mode="w", encoding="utf-8", delay=True),
     ],
 )
 log = logging.getLogger("scraper")
@@ -61,6 +84,10 @@ def warn(msg, *args):  log.warning(msg, *args)
 def now_utc():
     return datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
 
+def norm_space(text: str) -> str:
+    """Collapse all runs of whitespace to single spaces in one pass."""
+    return " ".join(text.split())
+
 def normalize_title(title: str) -> str:
     """Lowercase + strip for case-insensitive title dedup."""
     return title.lower().strip()
@@ -72,61 +99,143 @@ def title_guid(title: str) -> str:
 # ------------------------------
 # HTTP helpers
 # ------------------------------
+# Shared keep-alive pool for all plain-requests traffic (FlareSolverr
+# fallback POSTs and simple_get), sized for a handful of hosts.
+_http = requests.Session()
+_http.headers["Connection"] = "keep-alive"
+# connection-level retries only; status-code retries happen in simple_get
+# with full jitter so they aren't paid twice. Without the flag, urllib3
+# still auto-retries 429/503 responses carrying Retry-After, sleeping the
+# header value verbatim (not bounded by SIMPLE_RETRY_CAP).
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, respect_retry_after_header=False),
+)
+_http.mount("http://", _adapter)
+_http.mount("https://", _adapter)
+
+
+_UA_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/117 Safari/537.36"
+    )
+}
+
+
 def simple_get(url: str, timeout: int = SIMPLE_TIMEOUT) -> str | None:
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/117 Safari/537.36"
-        )
-    }
-    try:
-        r = requests.get(url, timeout=timeout, headers=headers)
-    except Exception as e:
-        debug("simple_get exception for %s : %s", url, e)
-        return None
-    if r.status_code != 200:
+    """GET with full-jitter exponential backoff.
+
+    Only transient failures (timeouts, connection errors, 429/5xx) are
+    retried — other client errors fail fast. A Retry-After header, when
+    sent, is honored before the next attempt."""
+    for attempt in range(SIMPLE_RETRIES):
+        if attempt:
+            time.sleep(random.uniform(
+                0, min(SIMPLE_RETRY_CAP, SIMPLE_BACKOFF * 2 ** attempt)
+            ))
+        try:
+            r = _http.get(url, timeout=timeout, headers=_UA_HEADERS)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            debug("simple_get transient error for %s : %s", url, e)
+            continue
+        except Exception as e:
+            debug("simple_get exception for %s : %s", url, e)
+            return None
+        if r.status_code == 200:
+            if "charset" not in r.headers.get("Content-Type", "").lower():
+                # requests labels charset-less text/* as latin-1 per RFC
+                # instead of sniffing; detect once here so .text decodes
+                # right and lxml never re-detects downstream
+                r.encoding = r.apparent_encoding
+            return r.text
+        if r.status_code not in _TRANSIENT_STATUSES:
+            debug("simple_get: non-retryable HTTP %s for %s", r.status_code, url)
+            return None
         debug("simple_get: HTTP %s for %s", r.status_code, url)
-        return None
-    return r.text
+        retry_after = r.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            time.sleep(min(SIMPLE_RETRY_CAP, int(retry_after)))
+    return None
 
 
-_flare_session_id = "scraper_session_1"
+def _cache_path(url: str) -> Path:
+    return CACHE_DIR / (hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html.gz")
 
-def flare_get(url: str, timeout_ms: int = 120_000) -> str | None:
-    payload = {
-        "cmd": "request.get",
-        "url": url,
-        "maxTimeout": timeout_ms,
-        "session": _flare_session_id,
-    }
-    debug("FlareSolverr GET -> %s", url)
+
+def cache_get(url: str) -> str | None:
+    path = _cache_path(url)
     try:
-        r = requests.post(
-            FLARESOLVERR_URL,
-            json=payload,
-            timeout=(timeout_ms // 1000) + 15,
-        )
+        if path.exists() and time.time() - path.stat().st_mtime < CACHE_TTL:
+            html = gzip.decompress(path.read_bytes()).decode("utf-8")
+            debug("cache hit for %s", url)
+            return html
     except Exception as e:
-        debug("FlareSolverr request exception: %s", e)
-        return None
+        warn("cache read failed for %s: %s", url, e)
+    return None
 
-    if r.status_code != 200:
-        body = (r.text or "")[:2000]
-        warn(
-            "FlareSolverr returned HTTP %s for %s | body (truncated): %s",
-            r.status_code, url, body,
-        )
-        return None
 
+def cache_put(url: str, html: str) -> None:
     try:
-        data = r.json()
+        CACHE_DIR.mkdir(exist_ok=True)
+        _cache_path(url).write_bytes(gzip.compress(html.encode("utf-8")))
     except Exception as e:
-        warn(
-            "FlareSolverr returned non-json response for %s: %s | body (truncated): %s",
-            url, e, (r.text or "")[:2000],
-        )
-        return None
+        warn("cache write failed for %s: %s", url, e)
+
+
+_flare_session_id = "scraper_session_1"
+
+# circuit breaker thresholds for the FlareSolverr service
+CB_FAIL_THRESHOLD = 5    # consecutive failures before the circuit opens
+CB_RESET_TIMEOUT = 60.0  # seconds to stay open before admitting a probe
+
+
+class CircuitBreaker:
+    """Tiny circuit breaker for the FlareSolverr service.
+
+    After CB_FAIL_THRESHOLD consecutive failures the circuit opens and
+    calls are refused outright for CB_RESET_TIMEOUT seconds — when the
+    service is down, failing straight over to the requests fallback beats
+    queueing every section behind the full retry/backoff ladder. Once the
+    cooldown passes, a single probe is admitted (half-open); success
+    closes the circuit, another failure re-arms the cooldown."""
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.failures < CB_FAIL_THRESHOLD:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= CB_RESET_TIMEOUT:
+            # half-open: admit this one probe and re-arm the timer so
+            # concurrent callers stay refused until the probe resolves
+            self.opened_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.failures >= CB_FAIL_THRESHOLD:
+            info("FlareSolverr circuit closed again")
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures == CB_FAIL_THRESHOLD:
+            self.opened_at = time.monotonic()
+            warn(
+                "FlareSolverr circuit opened after %d consecutive failures",
+                self.failures,
+            )
 
+
+_flare_breaker = CircuitBreaker()
+
+
+def _extract_flare_html(data: dict, url: str) -> str | None:
+    """Pull the solved HTML out of a decoded FlareSolverr response."""
     status = data.get("status", "")
     if status != "ok":
         warn(
@@ -147,52 +256,198 @@ def flare_get(url: str, timeout_ms: int = 120_000) -> str | None:
     return html
 
 
-def fetch_page(url: str) -> str | None:
-    """Try FlareSolverr first, then fall back to plain requests."""
+async def flare_get_async(
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    url: str,
+    timeout_ms: int = 120_000,
+) -> str | None:
+    payload = {
+        "cmd": "request.get",
+        "url": url,
+        "maxTimeout": timeout_ms,
+        "session": _flare_session_id,
+    }
+    async with sem:
+        debug("FlareSolverr GET -> %s", url)
+        try:
+            # orjson both ways: the response embeds the whole page HTML as one
+            # escaped JSON string, which stdlib json decodes noticeably slower.
+            async with session.post(
+                FLARESOLVERR_URL,
+                data=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            ) as r:
+                if r.status != 200:
+                    body = (await r.text() or "")[:2000]
+                    warn(
+                        "FlareSolverr returned HTTP %s for %s | body (truncated): %s",
+                        r.status, url, body,
+                    )
+                    return None
+                raw = await r.read()
+        except Exception as e:
+            debug("FlareSolverr request exception: %s", e)
+            return None
+
+    try:
+        data = orjson.loads(raw)
+    except Exception as e:
+        warn(
+            "FlareSolverr returned non-json response for %s: %s | body (truncated): %s",
+            url, e, raw[:2000],
+        )
+        return None
+
+    return _extract_flare_html(data, url)
+
+
+async def _fetch_page_async(
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    url: str,
+) -> tuple[str, str | None]:
+    """FlareSolverr with retries; returns (url, html-or-None)."""
+    cached = cache_get(url)
+    if cached:
+        return url, cached
+
     for attempt in range(1, FLARE_RETRIES + 1):
-        html = flare_get(url)
+        if not _flare_breaker.allow():
+            debug("fetch_page: FlareSolverr circuit open — skipping %s", url)
+            break
+        html = await flare_get_async(session, sem, url)
         if html and len(html) > 200:
+            _flare_breaker.record_success()
             debug("fetch_page: got HTML from FlareSolverr (attempt %d)", attempt)
-            return html
+            cache_put(url, html)
+            return url, html
+        _flare_breaker.record_failure()
         debug("fetch_page: FlareSolverr attempt %d failed for %s", attempt, url)
-        time.sleep(FLARE_BACKOFF * attempt)
-
-    for attempt in range(1, SIMPLE_RETRIES + 1):
+        if attempt < FLARE_RETRIES:
+            # full-jitter exponential backoff: transient DataDome challenges
+            # usually clear, and jitter keeps parallel retries desynchronized
+            await asyncio.sleep(random.uniform(0, FLARE_BACKOFF * 2 ** (attempt - 1)))
+    return url, None
+
+
+async def _scrape_section_async(
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    url: str,
+) -> tuple[str, list[dict] | None]:
+    """Fetch one section, then parse it in a worker thread so the event loop
+    keeps dispatching the other fetches while bs4/lxml chew on this one."""
+    _, html = await _fetch_page_async(session, sem, url)
+    if not html:
+        return url, None   # caller retries via the sync fallback
+    return url, await asyncio.to_thread(parse_section, url, html)
+
+
+async def _scrape_all_async(urls: list[str]) -> dict[str, list[dict] | None]:
+    sem = asyncio.Semaphore(FLARE_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=FLARE_CONCURRENCY + 2)
+    timeout = aiohttp.ClientTimeout(total=135)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results = await asyncio.gather(
+            *(_scrape_section_async(session, sem, u) for u in urls),
+            return_exceptions=True,
+        )
+    out: dict[str, list[dict] | None] = {}
+    for u, res in zip(urls, results):
+        if isinstance(res, BaseException):
+            # a failed section falls through to the sync fallback in
+            # scrape_sections instead of cancelling the whole batch
+            warn("scrape: section task failed for %s: %s", u, res)
+            out[u] = None
+        else:
+            out[u] = res[1]
+    return out
+
+
+def scrape_sections(urls: list[str]) -> dict[str, list[dict]]:
+    """Fetch + parse all sections concurrently via FlareSolverr, then retry
+    any failures sequentially with plain requests."""
+    results = asyncio.run(_scrape_all_async(urls))
+
+    for url, articles in results.items():
+        if articles is not None:
+            continue
         html = simple_get(url, timeout=SIMPLE_TIMEOUT)
         if html and len(html) > 200:
-            debug("fetch_page: got HTML from simple_get (attempt %d)", attempt)
-            return html
-        debug("fetch_page: simple_get attempt %d failed for %s", attempt, url)
-        time.sleep(SIMPLE_BACKOFF * attempt)
+            debug("scrape_sections: got HTML from simple_get")
+            cache_put(url, html)
+        else:
+            html = None
+            warn("scrape_sections: all attempts failed for %s", url)
+        results[url] = parse_section(url, html)
 
-    warn("fetch_page: all attempts failed for %s", url)
-    return None
+    return results
 
 # ------------------------------
 # Parsing helpers
 # ------------------------------
+# parse_section runs in to_thread workers, so concurrent sections would
+# otherwise interleave writes to the shared debug file (which pau.yml commits)
+_debug_html_lock = threading.Lock()
+
+
 def save_debug_html(path: str, html: str) -> None:
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(html)
+        with _debug_html_lock:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
         debug("Saved HTML to %s (%d bytes)", path, len(html))
     except Exception as e:
         warn("Failed saving HTML %s: %s", path, e)
 
 
+def canonical_url(url: str) -> str:
+    """Strip query/fragment and trailing slash so tracking params don't make
+    the same article look new (and cost a duplicate feed entry)."""
+    p = urlsplit(url)
+    return urlunsplit((p.scheme, p.netloc, p.path.rstrip("/"), "", ""))
+
+
 def build_full_url(href: str, base: str = APNEWS_BASE) -> str | None:
     href = (href or "").strip()
-    if href.startswith("http"):
-        return href
-    if href.startswith("/"):
-        return base + href
-    return None
+    if not href:
+        return None
+    try:
+        url = urljoin(base, href)   # handles absolute, //host and relative forms
+        if not url.startswith("http"):
+            return None
+        return canonical_url(url)
+    except ValueError:
+        # urljoin/urlsplit reject some malformed hrefs (e.g. stray "[");
+        # scraped anchors are untrusted, so treat them as no URL at all
+        return None
+
+
+def _xp_class(name: str) -> str:
+    """XPath predicate matching a whole class token (CSS .name semantics)."""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+# XPath equivalents of the PagePromo CSS selectors — compiled once at import
+# and evaluated in libxml2 instead of re-parsed per call.
+_CARD_XPATH = etree.XPath(f'//div[{_xp_class("PagePromo")}]')
+_TITLE_LINK_XPATH = etree.XPath(
+    f'.//h3[{_xp_class("PagePromo-title")}]//a[{_xp_class("Link")}]'
+    f' | .//h2[{_xp_class("PagePromo-title")}]//a[{_xp_class("Link")}]'
+)
+_MEDIA_LINK_HREF_XPATH = etree.XPath(f'.//div[{_xp_class("PagePromo-media")}]/a[{_xp_class("Link")}]/@href')
+_MEDIA_IMG_XPATH = etree.XPath(f'.//div[{_xp_class("PagePromo-media")}]//img')
+_MEDIA_SRCSET_XPATH = etree.XPath(f'.//div[{_xp_class("PagePromo-media")}]//picture//source/@srcset')
+_ANCHOR_XPATH = etree.XPath("//a[@href]")
+_IMG_XPATH = etree.XPath(".//img")
 
 
 def _thumb_from_card(card) -> str:
     """Extract best available thumbnail URL from a PagePromo card."""
-    img_el = card.select_one("div.PagePromo-media img")
-    if img_el:
+    imgs = _MEDIA_IMG_XPATH(card)
+    if imgs:
+        img_el = imgs[0]
         raw = (
             img_el.get("src")
             or img_el.get("data-src")
@@ -208,56 +463,55 @@ def _thumb_from_card(card) -> str:
             return ss.split()[0].rstrip(",").strip()
 
     # fallback: first <source srcset> inside <picture>
-    picture = card.select_one("div.PagePromo-media picture")
-    if picture:
-        for src_el in picture.find_all("source"):
-            ss = src_el.get("srcset", "").strip()
-            if ss:
-                return ss.split()[0].rstrip(",").strip()
+    for ss in _MEDIA_SRCSET_XPATH(card):
+        ss = ss.strip()
+        if ss:
+            return ss.split()[0].rstrip(",").strip()
 
     return ""
 
 
 # ------------------------------
-# Per-section scraper
+# Per-section parser
 # ------------------------------
-def scrape_section(url: str) -> list[dict]:
+def parse_section(url: str, html: str | None) -> list[dict]:
     """
-    Fetch one AP News section page and return a list of article dicts:
+    Parse one fetched AP News section page and return a list of article dicts:
       { "url": str, "title": str, "thumb": str, "source": str }
     Falls back to a raw anchor scan if the card selector finds nothing.
     """
-    info("Fetching section: %s", url)
-    html = fetch_page(url)
     articles: list[dict] = []
 
     if not html:
-        warn("scrape_section: failed to fetch %s", url)
+        warn("parse_section: no HTML for %s", url)
         return articles
 
     # keep a debug copy of the last-fetched page
     save_debug_html(APNEWS_HTML_FILE, html)
 
-    soup = BeautifulSoup(html, "html.parser")
+    try:
+        tree = lxml_html.fromstring(html)
+    except etree.ParserError as e:
+        # e.g. whitespace-only body; one bad section must not kill the run
+        warn("parse_section: unparseable HTML for %s: %s", url, e)
+        return articles
     primary: list[tuple[str, str, str]] = []
 
     try:
-        for card in soup.select("div.PagePromo"):
+        for card in _CARD_XPATH(tree):
             # title + href from the headline anchor
-            title_el = (
-                card.select_one("h3.PagePromo-title a.Link")
-                or card.select_one("h2.PagePromo-title a.Link")
-            )
-            if not title_el:
+            title_els = _TITLE_LINK_XPATH(card)
+            if not title_els:
                 continue
-            title = title_el.get_text(" ", strip=True)
-            href  = title_el.get("href", "").strip()
+            title_el = title_els[0]
+            title = norm_space(title_el.text_content())
+            href  = (title_el.get("href") or "").strip()
 
             # some cards have the link only on the media wrapper
             if not href:
-                media_link = card.select_one("div.PagePromo-media > a.Link")
-                if media_link:
-                    href = media_link.get("href", "").strip()
+                media_hrefs = _MEDIA_LINK_HREF_XPATH(card)
+                if media_hrefs:
+                    href = media_hrefs[0].strip()
 
             full_url = build_full_url(href)
             if not full_url or not title:
@@ -267,7 +521,7 @@ def scrape_section(url: str) -> list[dict]:
             primary.append((full_url, title, thumb))
 
     except Exception as e:
-        warn("scrape_section: exception in card selector for %s: %s", url, e)
+        warn("parse_section: exception in card selector for %s: %s", url, e)
 
     if primary:
         info("Section %s — card selector matched %d articles", url, len(primary))
@@ -276,26 +530,28 @@ def scrape_section(url: str) -> list[dict]:
         return articles
 
     # ── fallback: raw anchor scan ─────────────────────────────────────────────
-    warn("scrape_section: card selector empty for %s — falling back to anchor scan", url)
-    seen: set[str] = set()
-    for a in soup.find_all("a", href=True):
-        href = a["href"].strip()
+    warn("parse_section: card selector empty for %s — falling back to anchor scan", url)
+    # insertion-ordered dict keyed by URL: dedupe without a parallel seen-set;
+    # reuses the tree already built for the card pass instead of re-parsing
+    by_url: dict[str, dict] = {}
+    for a in _ANCHOR_XPATH(tree):
+        href = (a.get("href") or "").strip()
         if "/article/" not in href:
             continue
-        title_text = a.get_text(" ", strip=True)
+        title_text = norm_space(a.text_content())
         if not title_text:
             continue
         full_url = build_full_url(href)
-        if not full_url or full_url in seen:
+        if not full_url or full_url in by_url:
             continue
-        seen.add(full_url)
         thumb = ""
-        parent = a.find_parent()
-        if parent:
-            img = parent.find("img")
-            if img:
-                thumb = (img.get("src") or img.get("data-src") or "").strip()
-        articles.append({"url": full_url, "title": title_text, "thumb": thumb, "source": url})
+        parent = a.getparent()
+        if parent is not None:
+            imgs = _IMG_XPATH(parent)
+            if imgs:
+                thumb = (imgs[0].get("src") or imgs[0].get("data-src") or "").strip()
+        by_url[full_url] = {"url": full_url, "title": title_text, "thumb": thumb, "source": url}
+    articles.extend(by_url.values())
 
     info("Section %s — fallback anchor scan found %d articles", url, len(articles))
     return articles
@@ -303,79 +559,119 @@ def scrape_section(url: str) -> list[dict]:
 # ------------------------------
 # Feed XML helpers
 # ------------------------------
-def load_or_create_xml(path: str, title: str, link: str, description: str):
-    if os.path.exists(path):
-        try:
-            tree = ET.parse(path)
-            root = tree.getroot()
-            info("Loaded existing XML: %s", path)
-        except ET.ParseError as e:
-            warn("XML parse error (%s) — creating new: %s", e, path)
-            root = ET.Element("rss", version="2.0")
-            tree = ET.ElementTree(root)
-    else:
-        root = ET.Element("rss", version="2.0")
-        tree = ET.ElementTree(root)
-        info("Created new XML root: %s", path)
-
-    channel = root.find("channel")
-    if channel is None:
-        channel = ET.SubElement(root, "channel")
-        ET.SubElement(channel, "title").text = title
-        ET.SubElement(channel, "link").text = link
-        ET.SubElement(channel, "description").text = description
-
-    return tree, root, channel
+def load_feed_items(path: str) -> list[dict]:
+    """Stream existing feed items into lightweight dicts (oldest first),
+    clearing each element as it is consumed instead of keeping a DOM."""
+    if not os.path.exists(path):
+        info("No existing XML feed: %s", path)
+        return []
+    items: list[dict] = []
+    try:
+        for _, elem in etree.iterparse(path, events=("end",), tag="item"):
+            enc = elem.find("enclosure")
+            items.append({
+                "title":   elem.findtext("title", "") or "",
+                "link":    elem.findtext("link", "") or "",
+                "desc":    elem.findtext("description", "") or "",
+                "pubDate": elem.findtext("pubDate", "") or "",
+                "guid":    (elem.findtext("guid", "") or "").strip(),
+                "thumb":   (enc.get("url") if enc is not None else "") or "",
+            })
+            # clear() alone leaves cleared siblings attached in lxml
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        info("Loaded existing XML: %s (%d items)", path, len(items))
+    except etree.XMLSyntaxError as e:
+        warn("XML parse error (%s) — starting fresh: %s", e, path)
+        return []
+    return items
+
+
+def write_feed(path: str, items: list[dict], title: str, link: str, description: str) -> None:
+    """Stream the channel to disk item-by-item with lxml's incremental
+    writer; the full serialized document never exists in memory.
+
+    Writes to a temp file and os.replace()s it into place so a killed run
+    can't leave a truncated pau.xml (which would drop the whole feed
+    history, and with it the dedupe short-circuit, on the next run)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with etree.xmlfile(tmp_path, encoding="utf-8") as xf:
+        xf.write_declaration()
+        with xf.element("rss", version="2.0"):
+            with xf.element("channel"):
+                for tag, text in (
+                    ("title", title),
+                    ("link", link),
+                    ("description", description),
+                ):
+                    el = etree.Element(tag)
+                    el.text = text
+                    xf.write(el)
+
+                for it in items:
+                    item_el = etree.Element("item")
+                    etree.SubElement(item_el, "title").text       = it["title"]
+                    etree.SubElement(item_el, "link").text        = it["link"]
+                    etree.SubElement(item_el, "description").text = it["desc"]
+                    etree.SubElement(item_el, "pubDate").text     = it["pubDate"]
+                    guid_el = etree.SubElement(item_el, "guid")
+                    guid_el.text = it["guid"]
+                    guid_el.set("isPermaLink", "false")
+                    if it.get("thumb"):
+                        etree.SubElement(item_el, "enclosure", url=it["thumb"], type="image/jpeg")
+                    xf.write(item_el)
+    os.replace(tmp_path, path)   # atomic on POSIX and Windows
 
 # ------------------------------
 # Main
 # ------------------------------
 def main():
-    # ── 1. Scrape every section ───────────────────────────────────────────────
-    raw_articles: list[dict] = []
-    for section_url in SOURCES:
-        raw_articles.extend(scrape_section(section_url))
-
-    # ── 2. Global deduplication by title (case-insensitive) ───────────────────
-    combined: list[dict] = []
-    seen_titles: set[str] = set()
-    for item in raw_articles:
-        t = normalize_title(item.get("title", ""))
-        if not t or t in seen_titles:
-            continue
-        seen_titles.add(t)
-        combined.append(item)
-
-    info("Total unique articles across all sections: %d", len(combined))
-
-    # ── 3. Load / create XML feed ─────────────────────────────────────────────
-    tree, root, channel = load_or_create_xml(
-        XML_FILE,
-        title="AP News Feed",
-        link="https://apnews.com",
-        description="Scraped articles from AP News (world news + climate)",
-    )
+    # ── 0. Load the existing feed up front so already-seen articles can be
+    #      dropped before any per-item work ───────────────────────────────────
+    feed_items = load_feed_items(XML_FILE)
 
     # Existing items keyed by guid (title hash) — RSS readers use <guid> as
     # the canonical identity key, NOT <link>, so same-URL/new-title = new item.
-    existing_guids: set[str] = {
-        item.find("guid").text.strip()
-        for item in channel.findall("item")
-        if item.find("guid") is not None and item.find("guid").text
-    }
+    existing_guids: set[str] = {it["guid"] for it in feed_items if it["guid"]}
     info("Existing items in feed: %d", len(existing_guids))
 
+    # ── 1. Fetch + parse every section concurrently ───────────────────────────
+    info("Fetching %d sections", len(SOURCES))
+    sections = scrape_sections(SOURCES)
+
+    # ── 2. Dedupe by title (case-insensitive) ─────────────────────────────────
+    # Dict keyed on the normalized title (insertion-ordered, first wins)
+    # over a chained iterator — no intermediate concatenated list and no
+    # separate seen-set bookkeeping.
+    by_title: dict[str, dict] = {}
+    for item in chain.from_iterable(sections.get(u) or [] for u in SOURCES):
+        t = normalize_title(item.get("title", ""))
+        if t:
+            by_title.setdefault(t, item)
+    combined: list[dict] = list(by_title.values())
+
+    info("Total unique articles across all sections: %d", len(combined))
+
+    # ── 3. Drop already-seen articles before building any item markup ─────────
+    fresh = [
+        art for art in combined
+        if title_guid(art.get("title") or "") not in existing_guids
+    ]
+    if len(fresh) < len(combined):
+        info("Skipping %d already-seen articles", len(combined) - len(fresh))
+
     # ── 4. Insert new items ───────────────────────────────────────────────────
     new_count = 0
-    for art in combined:
+    pub_date = now_utc()  # one batch timestamp; all items in a run are "now"
+    for art in fresh:
         title = (art.get("title") or "").strip()
         if not title:
             warn("Skipping (no title): %s", art.get("url"))
             continue
 
         guid = title_guid(title)
-        if guid in existing_guids:
-            continue
 
         thumb = (art.get("thumb") or "").strip()
         desc  = (
@@ -383,16 +679,14 @@ def main():
             if thumb else title
         )
 
-        item_el = ET.SubElement(channel, "item")
-        ET.SubElement(item_el, "title").text       = title
-        ET.SubElement(item_el, "link").text        = art["url"]
-        ET.SubElement(item_el, "description").text = desc
-        ET.SubElement(item_el, "pubDate").text     = now_utc()
-        guid_el = ET.SubElement(item_el, "guid")
-        guid_el.text = guid
-        guid_el.set("isPermaLink", "false")
-        if thumb:
-            ET.SubElement(item_el, "enclosure", url=thumb, type="image/jpeg")
+        feed_items.append({
+            "title":   title,
+            "link":    art["url"],
+            "desc":    desc,
+            "pubDate": pub_date,
+            "guid":    guid,
+            "thumb":   thumb,
+        })
 
         new_count += 1
         debug("Added: [%s] %s", guid[:8], art["url"])
@@ -400,15 +694,18 @@ def main():
     info("Added %d new articles to feed", new_count)
 
     # ── 5. Rolling cap ────────────────────────────────────────────────────────
-    all_items = channel.findall("item")
-    if len(all_items) > MAX_ITEMS:
-        for old in all_items[:-MAX_ITEMS]:
-            channel.remove(old)
+    if len(feed_items) > MAX_ITEMS:
+        feed_items = feed_items[-MAX_ITEMS:]
         info("Trimmed feed to %d items", MAX_ITEMS)
 
     # ── 6. Save ───────────────────────────────────────────────────────────────
-    os.makedirs(os.path.dirname(XML_FILE) or ".", exist_ok=True)
-    tree.write(XML_FILE, encoding="utf-8", xml_declaration=True)
+    write_feed(
+        XML_FILE,
+        feed_items,
+        title="AP News Feed",
+        link="https://apnews.com",
+        description="Scraped articles from AP News (world news + climate)",
+    )
     info("Done! Feed saved to %s", XML_FILE)
     info("Debug log saved to %s", LOG_FILENAME)
 
@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import gzip
+import hashlib
 import os
 import re
 import sys
 import logging
 import time
 import random
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from datetime import datetime, timezone
-from bs4 import BeautifulSoup
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:       # optional fast path; bs4 below still works without it
+    LexborHTMLParser = None
 
 from invisible_playwright import InvisiblePlaywright
 
@@ -25,7 +34,7 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s: %(message)s",
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler(LOG_FILENAME, mode="w", encoding="utf-8"),
+        logging.FileHandler(LOG_FILENAME, mode="w", encoding="utf-8", delay=True),
     ],
 )
 log = logging.getLogger("scraper")
@@ -44,10 +53,46 @@ MAX_ITEMS = 500
 REUTERS_BASE = "https://www.reuters.com"
 
 REUTERS_SKIP_PATHS = ("/newsletters/", "/graphics/", "/live-blog/", "/podcast/", "/video/")
+# Single compiled alternation: one C-level scan instead of N startswith probes
+_SKIP_PATH_RE = re.compile(r"^(?:%s)" % "|".join(map(re.escape, REUTERS_SKIP_PATHS)))
 REUTERS_JUNK_TITLES = {"video", "live", "graphic", "graphics", "podcast"}
 
+# Case-insensitive scan beats building a lowercased copy of the whole page
+_BLOCK_RE = re.compile(r"datadome|just a moment\.\.\.", re.IGNORECASE)
+
+# Compiled once: these run for every anchor on every listing page
+_REUTERS_HOST_RE = re.compile(r"https?://(?:www\.)?reuters\.com/")
+_DATED_SLUG_RE   = re.compile(r"-\d{4}-\d{2}-\d{2}$")
+_ID_SLUG_RE      = re.compile(r"-id[A-Z0-9]{5,}$", re.IGNORECASE)
+
 HEADLESS = os.environ.get("HEADLESS", "true").lower() == "true"
 
+# on-disk cache of fetched listing pages keyed by URL hash; short TTL since
+# the listings churn quickly but reruns minutes apart shouldn't pay a full
+# browser round-trip again
+CACHE_DIR = Path(".page_cache")
+CACHE_TTL = 15 * 60
+
+# Only anchors are ever read from the listing pages — strain everything else
+# out before bs4 builds tree nodes for it.
+_ANCHOR_STRAINER = SoupStrainer("a", href=True)
+_ANCHOR_CSS = "a[href]"
+
+
+def iter_anchors(html: str):
+    """Yield (href, text) for every anchor on a listing page.
+
+    Uses selectolax's Lexbor engine (C tree, ~10x faster than bs4 here) when
+    installed, falling back to the strained BeautifulSoup parse otherwise.
+    """
+    if LexborHTMLParser is not None:
+        for node in LexborHTMLParser(html).css(_ANCHOR_CSS):
+            yield (node.attributes.get("href") or ""), node.text(strip=True)
+    else:
+        soup = BeautifulSoup(html, "lxml", parse_only=_ANCHOR_STRAINER)
+        for a_tag in soup.find_all("a", href=True):
+            yield a_tag.get("href", ""), a_tag.get_text(strip=True)
+
 # ------------------------------
 # HELPERS
 # ------------------------------
@@ -56,50 +101,118 @@ def now_utc() -> str:
     return datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
 
 def is_valid_article_url(url: str, title: str = "") -> bool:
-    if not url or not re.match(r"https?://(?:www\.)?reuters\.com/", url):
+    if not url or not _REUTERS_HOST_RE.match(url):
         return False
     path = url.split("reuters.com", 1)[-1].split("?")[0]
-    if any(path.startswith(p) for p in REUTERS_SKIP_PATHS):
+    if _SKIP_PATH_RE.match(path):
         return False
     if title and title.strip().lower() in REUTERS_JUNK_TITLES:
         return False
     last = path.strip("/").split("/")[-1]
     if not last:
         return False
-    if last.count("-") >= 3 or re.search(r"-\d{4}-\d{2}-\d{2}$", last) or re.search(r"-id[A-Z0-9]{5,}$", last, re.IGNORECASE):
+    if last.count("-") >= 3 or _DATED_SLUG_RE.search(last) or _ID_SLUG_RE.search(last):
         return True
     return False
 
+def canonical_url(url: str) -> str:
+    """Strip query/fragment and trailing slash so tracking params don't make
+    the same article look new."""
+    p = urlsplit(url)
+    return urlunsplit((p.scheme, p.netloc, p.path.rstrip("/"), "", ""))
+
 def build_full_url(href: str) -> str:
     href = (href or "").strip()
     if not href: return ""
-    if href.startswith("http"): return href
-    if href.startswith("//"): return "https:" + href
-    if href.startswith("/"): return REUTERS_BASE + href
-    return ""
+    try:
+        url = urljoin(REUTERS_BASE, href)   # handles absolute, //host and relative forms
+        if not url.startswith("http"): return ""
+        return canonical_url(url)
+    except ValueError:
+        # urljoin/urlsplit reject some malformed hrefs (e.g. stray "[");
+        # scraped anchors are untrusted, so treat them as no URL at all
+        return ""
 
-def load_or_create_xml(path: str, title: str, link: str, description: str):
-    if os.path.exists(path):
-        try:
-            tree = ET.parse(path)
-            root = tree.getroot()
-            channel = root.find("channel")
-            if channel is not None:
-                return tree, root, channel
-        except ET.ParseError:
-            pass
-    root = ET.Element("rss", version="2.0")
-    tree = ET.ElementTree(root)
-    channel = ET.SubElement(root, "channel")
-    ET.SubElement(channel, "title").text = title
-    ET.SubElement(channel, "link").text = link
-    ET.SubElement(channel, "description").text = description
-    return tree, root, channel
+def load_feed_items(path: str) -> list:
+    """Stream existing feed items into plain dicts (oldest first) without
+    materializing the whole feed DOM just to copy four fields per item."""
+    if not os.path.exists(path):
+        return []
+    items = []
+    try:
+        for _, it in ET.iterparse(path, events=("end",), tag="item"):
+            enc = it.find("enclosure")
+            items.append(
+                {
+                    "title":   it.findtext("title", "") or "",
+                    "link":    (it.findtext("link", "") or "").strip(),
+                    "desc":    it.findtext("description", "") or "",
+                    "pubDate": it.findtext("pubDate", "") or "",
+                    "thumb":   (enc.get("url") if enc is not None else "") or "",
+                }
+            )
+            # clear() alone leaves cleared siblings attached in lxml
+            it.clear()
+            while it.getprevious() is not None:
+                del it.getparent()[0]
+    except ET.XMLSyntaxError:
+        return []
+    return items
+
+def write_feed(path: str, items: list, title: str, link: str, description: str):
+    """Stream the channel to disk item-by-item; atomic rename at the end."""
+    tmp_path = path + ".tmp"
+    with ET.xmlfile(tmp_path, encoding="utf-8") as xf:
+        xf.write_declaration()
+        with xf.element("rss", version="2.0"):
+            with xf.element("channel"):
+                for tag, text in (
+                    ("title", title),
+                    ("link", link),
+                    ("description", description),
+                ):
+                    el = ET.Element(tag)
+                    el.text = text
+                    xf.write(el)
+                for d in items:
+                    it = ET.Element("item")
+                    ET.SubElement(it, "title").text       = d["title"]
+                    ET.SubElement(it, "link").text        = d["link"]
+                    ET.SubElement(it, "description").text = d["desc"]
+                    ET.SubElement(it, "pubDate").text     = d["pubDate"]
+                    if d.get("thumb"):
+                        ET.SubElement(it, "enclosure", url=d["thumb"], type="image/jpeg")
+                    xf.write(it)
+    os.replace(tmp_path, path)
+
+def _cache_path(url: str) -> Path:
+    return CACHE_DIR / (hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html.gz")
+
+def cache_get(url: str):
+    path = _cache_path(url)
+    try:
+        if path.exists() and time.time() - path.stat().st_mtime < CACHE_TTL:
+            log.info("Cache hit for %s", url)
+            return gzip.decompress(path.read_bytes()).decode("utf-8")
+    except Exception as e:
+        log.warning("Cache read failed for %s: %s", url, e)
+    return None
+
+def cache_put(url: str, html: str):
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        _cache_path(url).write_bytes(gzip.compress(html.encode("utf-8")))
+    except Exception as e:
+        log.warning("Cache write failed for %s: %s", url, e)
 
 def fetch_page_html(browser, url: str, retries: int = 3):
     """Fetch URL via Invisible Playwright. Retries on failures or DataDome blocks."""
+    cached = cache_get(url)
+    if cached:
+        return cached
+
     for attempt in range(1, retries + 1):
-        log.info(f"Fetching {url} (Attempt {attempt}/{retries})")
+        log.info("Fetching %s (Attempt %d/%d)", url, attempt, retries)
         page = None
         try:
             # Jitter to avoid ML timing heuristics
@@ -113,17 +226,18 @@ def fetch_page_html(browser, url: str, retries: int = 3):
             
             html = page.content()
             
-            if "datadome" in html.lower() or "just a moment..." in html.lower():
-                log.warning(f"DataDome block detected on {url}. Backing off...")
+            if _BLOCK_RE.search(html):
+                log.warning("DataDome block detected on %s. Backing off...", url)
                 page.close()
                 time.sleep(attempt * 10)
                 continue
                 
             page.close()
+            cache_put(url, html)
             return html
-            
+
         except Exception as e:
-            log.warning(f"Fetch error: {e}")
+            log.warning("Fetch error: %s", e)
             if page:
                 try:
                     page.close()
@@ -138,6 +252,15 @@ def fetch_page_html(browser, url: str, retries: int = 3):
 
 def main():
     log.info("Starting up Invisible Playwright pipeline...")
+
+    # Load the existing feed before fetching so known URLs are dropped at
+    # collection time rather than after the expensive phase
+    feed_items = load_feed_items(REUTERS_XML_FILE)
+    # canonicalize stored links too: scraped URLs go through canonical_url,
+    # and historical feed entries keep their trailing slash
+    reuters_existing = {canonical_url(d["link"]) for d in feed_items if d["link"]}
+    log.info("Existing items in feed: %d", len(reuters_existing))
+
     all_articles = {}
 
     # Initialize the C++ patched anti-detect browser
@@ -149,57 +272,40 @@ def main():
             if not html:
                 continue
                 
-            # Parse the extracted DOM with BeautifulSoup
-            soup = BeautifulSoup(html, "lxml")
-            
-            for a_tag in soup.find_all("a", href=True):
-                raw_href = a_tag.get("href", "").strip()
-                raw_title = a_tag.get_text(strip=True)
+            for raw_href, raw_title in iter_anchors(html):
+                raw_href = raw_href.strip()
                 full_url = build_full_url(raw_href)
 
-                if is_valid_article_url(full_url, raw_title) and full_url not in all_articles:
-                    if len(raw_title) > 5: 
+                if (
+                    is_valid_article_url(full_url, raw_title)
+                    and full_url not in all_articles
+                    and full_url not in reuters_existing
+                ):
+                    if len(raw_title) > 5:
                         all_articles[full_url] = raw_title
 
-    log.info(f"Total unique Reuters articles found: {len(all_articles)}")
+    log.info("Total unique Reuters articles found: %d", len(all_articles))
 
-    # 2. Setup RSS XML Document
-    reuters_tree, _, reuters_channel = load_or_create_xml(
-        REUTERS_XML_FILE,
-        "Reuters Feed",
-        "https://evilgodfahim.github.io/wl/reuters",
-        "Scraped articles from Reuters",
-    )
-
-    reuters_existing = {
-        item.find("link").text.strip()
-        for item in reuters_channel.findall("item")
-        if item.find("link") is not None and item.find("link").text
-    }
-
-    # 3. Populate XML
+    # 2. Append new items (all_articles already excludes known URLs)
     new_count = 0
     current_time = now_utc()
-    
+
     for url, title in all_articles.items():
-        if url in reuters_existing:
-            continue
-
-        el = ET.SubElement(reuters_channel, "item")
-        ET.SubElement(el, "title").text = title
-        ET.SubElement(el, "link").text = url
-        ET.SubElement(el, "description").text = title
-        ET.SubElement(el, "pubDate").text = current_time
+        feed_items.append({"title": title, "link": url, "desc": title, "pubDate": current_time})
         new_count += 1
 
-    # 4. Trim to rolling cap
-    all_items = reuters_channel.findall("item")
-    for old in all_items[:-MAX_ITEMS]:
-        reuters_channel.remove(old)
+    # 3. Trim to rolling cap
+    feed_items = feed_items[-MAX_ITEMS:]
 
-    # 5. Save State
-    reuters_tree.write(REUTERS_XML_FILE, encoding="utf-8", xml_declaration=True)
-    log.info(f"Done! {new_count} new articles saved to {REUTERS_XML_FILE}")
+    # 4. Save State
+    write_feed(
+        REUTERS_XML_FILE,
+        feed_items,
+        "Reuters Feed",
+        "https://evilgodfahim.github.io/wl/reuters",
+        "Scraped articles from Reuters",
+    )
+    log.info("Done! %d new articles saved to %s", new_count, REUTERS_XML_FILE)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
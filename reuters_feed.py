@@ -5,15 +5,17 @@ Decodes Google News redirect URLs, tracks seen GUIDs, outputs a
 500-item Inoreader-friendly RSS 2.0 feed.
 """
 
-import json
 import re
 import time
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import feedparser
+import orjson
 import requests
+from lxml import etree
+from requests.adapters import HTTPAdapter
 from googlenewsdecoder import new_decoderv1 as gnewsdecoder
 
 # ── Config ────────────────────────────────────────────────────────────────────
@@ -22,7 +24,8 @@ STATE_FILE   = "state/seen_guids.json"
 OUTPUT_FILE  = "feed/reuters_direct.xml"
 MAX_ITEMS    = 500
 MAX_SEEN     = 2000          # trim seen list beyond this to avoid unbounded growth
-DECODE_DELAY = 0.3           # seconds between decode attempts (fallback-path courtesy)
+DECODE_DELAY = 0.3           # seconds before a redirect-fallback request (courtesy)
+DECODE_WORKERS = 8           # parallel decode threads (I/O-bound fallback path)
 
 FEED_TITLE = "Reuters (Direct)"
 FEED_DESC  = "Reuters news with direct article URLs, decoded from Google News"
@@ -35,6 +38,13 @@ HEADERS = {
     )
 }
 
+# Shared keep-alive session for the redirect fallback; pool sized to match
+# the decode thread pool so workers never block on a free connection.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 def now_rfc822() -> str:
@@ -48,13 +58,13 @@ def strip_html(s: str) -> str:
 # ── State ─────────────────────────────────────────────────────────────────────
 def load_seen(path: str) -> list:
     p = Path(path)
-    return json.loads(p.read_text()) if p.exists() else []
+    return orjson.loads(p.read_bytes()) if p.exists() else []
 
 
 def save_seen(path: str, seen: list):
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     # keep only the most recent MAX_SEEN GUIDs
-    Path(path).write_text(json.dumps(seen[-MAX_SEEN:]))
+    Path(path).write_bytes(orjson.dumps(seen[-MAX_SEEN:]))
 
 
 # ── URL Decoding ──────────────────────────────────────────────────────────────
@@ -79,7 +89,8 @@ def decode_url(google_url: str) -> str:
 
     # Fallback: HTTP redirect
     try:
-        r = requests.get(google_url, allow_redirects=True, headers=HEADERS, timeout=15)
+        time.sleep(DECODE_DELAY)
+        r = SESSION.get(google_url, allow_redirects=True, headers=HEADERS, timeout=15)
         if r.url and r.url.startswith("http") and "google.com" not in r.url:
             return r.url
     except Exception as e:
@@ -92,51 +103,59 @@ def decode_url(google_url: str) -> str:
 def load_existing(path: str) -> list:
     if not Path(path).exists():
         return []
+    items = []
     try:
-        root = ET.parse(path).getroot()
-        ch = root.find("channel")
-        if ch is None:
-            return []
-        return [
-            {
-                "title":   it.findtext("title", ""),
-                "link":    it.findtext("link", ""),
-                "desc":    it.findtext("description", ""),
-                "pubDate": it.findtext("pubDate", ""),
-            }
-            for it in ch.findall("item")
-        ]
+        # Stream <item> elements instead of materializing the whole feed DOM;
+        # each element is cleared as soon as its fields are copied out.
+        for _, elem in etree.iterparse(path, events=("end",), tag="item"):
+            items.append(
+                {
+                    "title":   elem.findtext("title", ""),
+                    "link":    elem.findtext("link", ""),
+                    "desc":    elem.findtext("description", ""),
+                    "pubDate": elem.findtext("pubDate", ""),
+                }
+            )
+            # clear() alone leaves cleared siblings attached in lxml
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        return items
     except Exception as e:
         print(f"[load_existing failed: {e}]")
         return []
 
 
+def _text_el(tag: str, text: str) -> etree._Element:
+    el = etree.Element(tag)
+    el.text = text
+    return el
+
+
 def write_rss(items: list, path: str):
-    rss = ET.Element("rss", attrib={"version": "2.0"})
-    ch  = ET.SubElement(rss, "channel")
-
-    ET.SubElement(ch, "title").text       = FEED_TITLE
-    ET.SubElement(ch, "link").text        = FEED_LINK
-    ET.SubElement(ch, "description").text = FEED_DESC
-    ET.SubElement(ch, "language").text    = "en-US"
-    ET.SubElement(ch, "lastBuildDate").text = now_rfc822()
-
-    for d in items:
-        it = ET.SubElement(ch, "item")
-        ET.SubElement(it, "title").text       = d["title"]
-        ET.SubElement(it, "link").text        = d["link"]
-        ET.SubElement(it, "description").text = d["desc"]
-        ET.SubElement(it, "pubDate").text     = d["pubDate"]
-        g = ET.SubElement(it, "guid")
-        g.set("isPermaLink", "true")
-        g.text = d["link"]
-
-    ET.indent(rss, space="  ")   # requires Python ≥ 3.9
+    """Stream the feed to disk item-by-item with lxml's incremental writer,
+    so the full serialized document is never held in memory."""
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    Path(path).write_text(
-        '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(rss, encoding="unicode"),
-        encoding="utf-8",
-    )
+    with etree.xmlfile(path, encoding="UTF-8") as xf:
+        xf.write_declaration()
+        with xf.element("rss", version="2.0"):
+            with xf.element("channel"):
+                xf.write(_text_el("title", FEED_TITLE))
+                xf.write(_text_el("link", FEED_LINK))
+                xf.write(_text_el("description", FEED_DESC))
+                xf.write(_text_el("language", "en-US"))
+                xf.write(_text_el("lastBuildDate", now_rfc822()))
+
+                for d in items:
+                    it = etree.Element("item")
+                    etree.SubElement(it, "title").text       = d["title"]
+                    etree.SubElement(it, "link").text        = d["link"]
+                    etree.SubElement(it, "description").text = d["desc"]
+                    etree.SubElement(it, "pubDate").text     = d["pubDate"]
+                    g = etree.SubElement(it, "guid")
+                    g.set("isPermaLink", "true")
+                    g.text = d["link"]
+                    xf.write(it, pretty_print=True)
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
@@ -156,7 +175,8 @@ def main():
     entries = feed.entries
     print(f"Feed entries: {len(entries)}")
 
-    new_items = []
+    batch_time = now_rfc822()   # one timestamp for entries missing a pubDate
+    candidates = []
     for entry in entries:
         guid = entry.get("id", "")
         if not guid or guid in seen_set:
@@ -165,15 +185,22 @@ def main():
         title   = entry.get("title", "No title")
         raw_url = entry.get("link", "")
         desc    = strip_html(entry.get("summary", title))
-        pub     = entry.get("published", now_rfc822())
+        pub     = entry.get("published", batch_time)
+        candidates.append({"guid": guid, "title": title, "raw_url": raw_url,
+                           "desc": desc, "pubDate": pub})
+        seen_set.add(guid)
 
-        print(f"  → {title[:75]}")
-        direct_url = decode_url(raw_url)
+    # Decode in parallel: the decoder itself is pure computation, but the
+    # redirect fallback blocks on the network. map() preserves feed order.
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as ex:
+        direct_urls = list(ex.map(decode_url, (c["raw_url"] for c in candidates)))
 
-        new_items.append({"title": title, "link": direct_url, "desc": desc, "pubDate": pub})
-        seen_list.append(guid)
-        seen_set.add(guid)
-        time.sleep(DECODE_DELAY)
+    new_items = []
+    for c, direct_url in zip(candidates, direct_urls):
+        print(f"  → {c['title'][:75]}")
+        new_items.append({"title": c["title"], "link": direct_url,
+                          "desc": c["desc"], "pubDate": c["pubDate"]})
+        seen_list.append(c["guid"])
 
     print(f"New items   : {len(new_items)}")
 